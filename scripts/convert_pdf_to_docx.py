@@ -8,13 +8,20 @@ from pdf2docx import Converter
 
 PDF_IN = "data/Resume-ANURAJ.pdf"
 DOCX_OUT = "data/base_resume.docx"
+PARALLEL_MIN_PAGES = 3  # below this, worker start-up costs more than it saves
 
 def convert():
     if not os.path.exists(PDF_IN):
         raise FileNotFoundError(f"Input PDF not found: {PDF_IN}")
     os.makedirs(os.path.dirname(DOCX_OUT), exist_ok=True)
     cv = Converter(PDF_IN)
-    cv.convert(DOCX_OUT, start=0, end=None)
+    n_pages = len(cv.fitz_doc)
+    if n_pages >= PARALLEL_MIN_PAGES:
+        # pdf2docx splits the page range across worker processes and merges the parts
+        workers = min(os.cpu_count() or 1, n_pages)
+        cv.convert(DOCX_OUT, start=0, end=None, multi_processing=True, cpu_count=workers)
+    else:
+        cv.convert(DOCX_OUT, start=0, end=None)
     cv.close()
     print(f"Converted {PDF_IN} -> {DOCX_OUT}")
 
@@ -1,7 +1,11 @@
 import smtplib, os
 from email.message import EmailMessage
 
-def send_email(to_email, subject, body, attachment_path=None):
+SMTP_HOST = "smtp.gmail.com"
+SMTP_SSL_PORT = 465  # implicit TLS: no STARTTLS round-trip
+
+
+def build_message(to_email, subject, body, attachment_path=None):
     msg = EmailMessage()
     msg["From"] = os.getenv("SENDER_EMAIL")
     msg["To"] = to_email
@@ -11,8 +15,38 @@ def send_email(to_email, subject, body, attachment_path=None):
     if attachment_path:
         with open(attachment_path, "rb") as f:
             msg.add_attachment(f.read(), maintype="application", subtype="octet-stream", filename=os.path.basename(attachment_path))
-    
-    with smtplib.SMTP("smtp.gmail.com", 587) as smtp:
-        smtp.starttls()
-        smtp.login(os.getenv("SENDER_EMAIL"), os.getenv("EMAIL_PASSWORD"))
-        smtp.send_message(msg)
+    return msg
+
+
+class EmailBatch:
+    """
+    Log in to SMTP once and send many messages on the same connection:
+
+        with EmailBatch() as eb:
+            for job in jobs:
+                eb.send(job["email"], subject, body, resume_path)
+    """
+
+    def __enter__(self):
+        self.smtp = smtplib.SMTP_SSL(SMTP_HOST, SMTP_SSL_PORT)
+        try:
+            self.smtp.login(os.getenv("SENDER_EMAIL"), os.getenv("EMAIL_PASSWORD"))
+        except Exception:
+            # __exit__ does not run when __enter__ raises
+            self.smtp.close()
+            raise
+        return self
+
+    def send(self, to_email, subject, body, attachment_path=None):
+        self.smtp.send_message(build_message(to_email, subject, body, attachment_path))
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.smtp.quit()
+        except smtplib.SMTPException:
+            self.smtp.close()
+
+
+def send_email(to_email, subject, body, attachment_path=None):
+    with EmailBatch() as eb:
+        eb.send(to_email, subject, body, attachment_path)
@@ -1,13 +1,98 @@
 # src/job_search.py
-import requests, os, json, urllib.parse
+import requests, os, time, hashlib, threading, urllib.parse
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
+from src import state_db
+from src.json_utils import loads, dumps, dump_file
 load_dotenv()
 
+CSE_URL = "https://www.googleapis.com/customsearch/v1"
+CSE_PAGE_SIZE = 10  # Google CSE limits to 10 per request
+CSE_MAX_RESULTS = 100  # CSE never serves results past start=91
+CSE_CACHE_TTL_SECONDS = int(os.getenv("CSE_CACHE_TTL_SECONDS", 6 * 3600))
+os.makedirs("data", exist_ok=True)  # for jobcatcher.json
 
-def search_jobs(query="QA Automation Engineer", location_keywords=None, max_results=10):
+# --- Shared HTTP session: keep-alive pool + retry on transient errors ---
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3,
+                      status_forcelist=[429, 500, 502, 503, 504],
+                      raise_on_status=False),
+))
+
+
+# --- Page cache in the shared SQLite state file (saves CSE quota on re-runs) ---
+def _cache_key(params: dict, start: int, num: int) -> str:
+    # fingerprint the key instead of storing it; cx + key identify the engine/quota
+    key_fp = hashlib.blake2b(params["key"].encode(), digest_size=8).hexdigest()
+    raw = "\x1f".join([key_fp, params["cx"], params["q"], str(num), str(start)])
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+def _cache_read(key: str):
+    row = state_db.fetchone("SELECT payload, ts FROM cse_pages WHERE key=?", (key,))
+    if row is None or time.time() - row[1] >= CSE_CACHE_TTL_SECONDS:
+        return None
+    return loads(row[0])
+
+
+def _cache_write(key: str, items: list):
+    state_db.execute("INSERT OR REPLACE INTO cse_pages(key, payload, ts) VALUES (?, ?, ?)",
+                     (key, dumps(items), time.time()))
+
+
+def _load_page(key: str, params: dict, start: int, num: int, refresh: bool) -> list:
+    if not refresh:
+        items = _cache_read(key)
+        if items is not None:
+            return items
+
+    resp = _SESSION.get(CSE_URL, params=dict(params, start=start, num=num), timeout=15)
+    resp.raise_for_status()
+    items = loads(resp.content).get("items", [])
+    _cache_write(key, items)
+    return items
+
+
+# --- In-flight request coalescing: concurrent callers for the same page share one request ---
+_INFLIGHT = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+
+def _fetch_page(params: dict, start: int, num: int, refresh: bool = False):
+    """Fetch a single CSE result page (cached in state.sqlite). Returns (start, items)."""
+    key = _cache_key(params, start, num)
+    with _INFLIGHT_LOCK:
+        fut = _INFLIGHT.get(key)
+        owner = fut is None
+        if owner:
+            fut = _INFLIGHT[key] = Future()
+    if not owner:
+        return start, fut.result()
+
+    try:
+        items = _load_page(key, params, start, num, refresh)
+        fut.set_result(items)
+        return start, items
+    except BaseException as e:
+        fut.set_exception(e)
+        raise
+    finally:
+        with _INFLIGHT_LOCK:
+            _INFLIGHT.pop(key, None)
+
+
+def search_jobs(query="QA Automation Engineer", location_keywords=None, max_results=10, refresh=False):
     """
     Use Google Custom Search API to find job postings.
     location_keywords: list e.g. ["Bangalore", "Bengaluru", "Remote"]
+    max_results above 10 is served as several CSE pages fetched concurrently.
+    Pages are cached in the cse_pages table of data/state.sqlite for CSE_CACHE_TTL_SECONDS (6 h);
+    pass refresh=True to bypass the cache.
     Returns a list of {title, url, snippet}
     """
     api_key = os.getenv("GOOGLE_API_KEY")
@@ -29,26 +114,30 @@ def search_jobs(query="QA Automation Engineer", location_keywords=None, max_resu
         "key": api_key,
         "cx": cx,
         "q": q,
-        "num": min(max_results, 10)  # Google CSE limits to 10 per request
     }
 
-    url = "https://www.googleapis.com/customsearch/v1"
-    resp = requests.get(url, params=params, timeout=15)
-    resp.raise_for_status()
-    data = resp.json()
+    # one (start, num) pair per CSE page; start is 1-based
+    total = max(1, min(max_results, CSE_MAX_RESULTS))
+    pages = [(start, min(CSE_PAGE_SIZE, total - start + 1))
+             for start in range(1, total + 1, CSE_PAGE_SIZE)]
+
+    items_by_start = {}
+    with ThreadPoolExecutor(max_workers=min(16, len(pages))) as ex:
+        futs = [ex.submit(_fetch_page, params, start, num, refresh) for start, num in pages]
+        for fut in as_completed(futs):
+            start, items = fut.result()
+            items_by_start[start] = items
 
-    items = data.get("items", [])
     jobs = []
-    for it in items:
-        jobs.append({
-            "title": it.get("title"),
-            "url": it.get("link"),
-            "snippet": it.get("snippet")
-        })
+    for start in sorted(items_by_start):
+        for it in items_by_start[start]:
+            jobs.append({
+                "title": it.get("title"),
+                "url": it.get("link"),
+                "snippet": it.get("snippet")
+            })
 
     # persist to file for later steps
-    os.makedirs("data", exist_ok=True)
-    with open("data/jobcatcher.json", "w", encoding="utf-8") as f:
-        json.dump(jobs, f, indent=2, ensure_ascii=False)
+    dump_file(jobs, "data/jobcatcher.json")
 
     return jobs
@@ -0,0 +1,35 @@
+"""
+JSON helpers – orjson when installed (Rust, returns bytes), stdlib json otherwise
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+
+def loads(data):
+    """Parse JSON from str or bytes."""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes (non-ASCII kept as-is)."""
+    if orjson:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode("utf-8")
+
+
+def load_file(path: str):
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def dump_file(obj, path: str, indent: bool = False):
+    with open(path, "wb") as f:
+        f.write(dumps(obj, indent=indent))
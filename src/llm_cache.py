@@ -0,0 +1,35 @@
+"""
+LLM response cache – exact-match on the full request, stored in the shared SQLite state file
+"""
+
+import os
+import json
+import time
+import hashlib
+from src import state_db
+from src.json_utils import loads, dumps
+
+# entries older than this are ignored (0 = never expire)
+CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", 30 * 24 * 3600))
+
+
+def make_key(request: dict) -> str:
+    """Stable SHA-256 of the request (model, sampling params, messages)."""
+    # stdlib json on purpose: the key format must not depend on whether orjson is installed
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def get(key: str):
+    """Cached response dict, or None on miss / expired entry."""
+    row = state_db.fetchone("SELECT response, ts FROM llm_cache WHERE key=?", (key,))
+    if row is None:
+        return None
+    response, ts = row
+    if CACHE_TTL_SECONDS and time.time() - ts > CACHE_TTL_SECONDS:
+        return None
+    return loads(response)
+
+
+def put(key: str, response: dict):
+    state_db.execute("INSERT OR REPLACE INTO llm_cache(key, response, ts) VALUES (?, ?, ?)",
+                     (key, dumps(response).decode("utf-8"), int(time.time())))
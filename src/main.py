@@ -7,82 +7,106 @@ Main orchestrator for QA Job Apply Agent.
 - Saves outputs and notifies via Telegram
 """
 import os
+import re
+import asyncio
+import hashlib
 import traceback
+from io import BytesIO
+from collections import Counter
 from scripts.convert_pdf_to_docx import convert as convert_pdf_to_docx
 from src.job_search import search_jobs
-from src.resume_tailor import tailor_and_save  # uses OpenAI
-from src.telegram_bot import send_message
+from src.resume_tailor import (  # uses OpenAI
+    tailor_and_save_async, tailor_many, warm_up_models, base_resume_bytes, base_heading_index,
+    BASE_DOCX, OUT_DIR_RESUMES, OUT_DIR_DESC,
+)
+from src.telegram_bot import MessageBatcher
 from dotenv import load_dotenv
-import time
 
 load_dotenv()  # load .env for local runs
 
+TOP_N = int(os.getenv("TAILOR_TOP_N", "3"))
+MAX_OVERLAPPING_RUNS = 2
+# BATCH_TAILOR=1 tailors all top jobs with a single OpenAI request
+BATCH_TAILOR = os.getenv("BATCH_TAILOR") == "1"
+# jobs whose snippet mentions fewer core tool/stack terms than this skip the LLM (local tailoring only).
+# Generic words the search query itself supplies ("QA", "automation", "testing") are left out on
+# purpose: nearly every result contains them, so they say nothing about the listing.
+MIN_KEYWORD_HITS = int(os.getenv("MIN_KEYWORD_HITS", "1"))
+KEYWORDS = frozenset({
+    "selenium", "webdriver", "java", "python", "testng", "junit", "cucumber", "bdd",
+    "api", "postman", "playwright", "cypress", "appium", "jenkins",
+})
+
+# Status lines arrive in bursts; batch them into fewer Telegram messages
+_batcher = MessageBatcher()
+# strong references to fire-and-forget tasks (the loop only keeps weak ones)
+_background = set()
+
+def notify(text: str):
+    _batcher.send(text)
+
+async def anotify(text: str):
+    await asyncio.to_thread(notify, text)
+
 # --- Local fallback tailoring (simple, free heuristic)
-def local_tailor_and_save(job_title: str, company_name: str, job_desc: str):
+_TOKEN_RE = re.compile(r"[a-z]{4,}")
+_COMMON_TERMS_RE = re.compile(
+    r"\b(selenium|java|python|bdd|cucumber|rest|api|ci/cd|jenkins|page object model|webdriver)s?\b", re.I)
+_NON_WORD_RE = re.compile(r"[^\w]+")
+_WORD_RE = re.compile(r"\w+")
+_STOP = frozenset({"with", "that", "which", "using", "experience", "years", "required", "role", "will", "work"})
+
+def local_tailor_and_save(job_title: str, company_name: str, job_desc: str, job_id: str = None):
     """
     Simple free fallback:
     - Reads base_resume.docx text
     - Finds top keywords from job_desc
     - Inserts keywords into top-of-resume summary and skills section
-    - Saves as Anuraj_<Company>_local.docx (no PDF conversion)
+    - Saves as Anuraj_<Company>[_<job_id>]_LOCAL.docx (no PDF conversion)
     """
     from docx import Document
-    import re, json
 
-    BASE_DOCX = "data/base_resume.docx"
-    OUT_DIR_RESUMES = "output/resumes"
-    OUT_DIR_DESC = "output/descriptions"
-    os.makedirs(OUT_DIR_RESUMES, exist_ok=True)
-    os.makedirs(OUT_DIR_DESC, exist_ok=True)
-
-    # read docx
-    doc = Document(BASE_DOCX)
-    full_text = "\n".join([p.text for p in doc.paragraphs if p.text and not p.text.isspace()])
+    # output dirs are created once when src.resume_tailor is imported
+    # read docx (bytes are cached across jobs)
+    doc = Document(BytesIO(base_resume_bytes(BASE_DOCX)))
 
     # extract keywords (very simple): words that appear frequently & capitalized tech terms
     job_text = job_desc.lower()
-    keywords = []
-    common_terms = ["selenium", "java", "python", "bdd", "cucumber", "rest", "api", "ci/cd", "jenkins", "page object model", "webdriver"]
-    for t in common_terms:
-        if t in job_text:
-            keywords.append(t.upper() if "/" not in t else t.upper())
-
-    # fallback: get top nouns (very naive)
-    tokens = [w.strip(".,()") for w in job_text.split() if len(w) > 3]
-    freq = {}
-    for w in tokens:
-        freq[w] = freq.get(w, 0) + 1
-    # get top 5 frequent tokens (excluding stop-ish words)
-    stop = set(["with","that","which","using","experience","years","required","role","will","work","and","the","for","in","a","to"])
-    top_tokens = [k for k, v in sorted(freq.items(), key=lambda x: x[1], reverse=True) if k not in stop][:5]
+    # one regex sweep for the known tech terms, deduplicated in order of appearance
+    keywords = list(dict.fromkeys(t.upper() for t in _COMMON_TERMS_RE.findall(job_text)))
+
+    # fallback: get top 5 frequent tokens (excluding stop-ish words; very naive)
+    counts = Counter(w for w in _TOKEN_RE.findall(job_text) if w not in _STOP)
+    top_tokens = [w for w, _ in counts.most_common(5)]
     for t in top_tokens:
         if t.lower() not in [k.lower() for k in keywords]:
             keywords.append(t.upper())
 
+    # doc.paragraphs rebuilds its proxy list on every access; take it once
+    paragraphs = doc.paragraphs
+
     # Insert keywords into the first "summary" paragraph or top area
-    if len(doc.paragraphs) > 0:
+    if paragraphs:
         # prepend a short tailored summary line
         summary_line = f"Tailored for {job_title} — highlights: {', '.join(keywords)}"
-        doc.paragraphs[0].text = summary_line + "\n" + doc.paragraphs[0].text
-
-    # Try to find a "Skills" heading and insert keywords line
-    inserted_skills = False
-    for i, p in enumerate(doc.paragraphs):
-        txt = p.text.strip().lower()
-        if "skills" in txt or "core competencies" in txt or "it skills" in txt:
-            # replace next paragraph with keywords
-            if i+1 < len(doc.paragraphs):
-                doc.paragraphs[i+1].text = ", ".join([k.upper() for k in keywords])
-            else:
-                doc.add_paragraph(", ".join([k.upper() for k in keywords]))
-            inserted_skills = True
-            break
-    if not inserted_skills:
+        paragraphs[0].text = summary_line + "\n" + paragraphs[0].text
+
+    # Find the "Skills" heading via the cached base-resume index and insert keywords line
+    skills_idx = base_heading_index(BASE_DOCX).get("skills")
+    if skills_idx is not None:
+        # replace next paragraph with keywords
+        if skills_idx + 1 < len(paragraphs):
+            paragraphs[skills_idx + 1].text = ", ".join([k.upper() for k in keywords])
+        else:
+            doc.add_paragraph(", ".join([k.upper() for k in keywords]))
+    else:
         # append skills at the end
         doc.add_paragraph("Tailored Skills: " + ", ".join([k.upper() for k in keywords]))
 
     # Save docx
-    company_clean = re.sub(r"[^\w]+", "_", (company_name or job_title).strip())[:120]
+    company_clean = _NON_WORD_RE.sub("_", (company_name or job_title).strip())[:120]
+    if job_id:
+        company_clean += f"_{job_id}"
     fname = f"Anuraj_{company_clean}_LOCAL.docx"
     out_docx = os.path.join(OUT_DIR_RESUMES, fname)
     doc.save(out_docx)
@@ -94,58 +118,142 @@ def local_tailor_and_save(job_title: str, company_name: str, job_desc: str):
 
     return out_docx, None  # no PDF conversion for local fallback
 
-def main():
+def _job_fields(job: dict):
+    """
+    (title, company_name, snippet, job_id) used for tailoring a search result.
+    job_id (short hash of the URL) makes output names unique: listings like
+    "QA Automation Engineer - Infosys" / "- TCS" share the same company_name.
+    """
+    title = job.get("title", "QA Engineer")
+    snippet = job.get("snippet", "")
+    company_name = job.get("title", "").split("-")[0].strip() or "Company"
+    key = job.get("url") or f"{title}\x1f{snippet}"
+    job_id = hashlib.blake2b(key.encode("utf-8"), digest_size=4).hexdigest()
+    return title, company_name, snippet, job_id
+
+def _keyword_hits(snippet: str) -> int:
+    """Distinct core QA terms in a job snippet."""
+    return len(KEYWORDS.intersection(_WORD_RE.findall(snippet.lower())))
+
+async def _tailor_low_signal(job: dict):
+    """Snippet too generic for the LLM to add anything: tailor locally, no API call."""
+    docx_path, _ = await asyncio.to_thread(local_tailor_and_save, *_job_fields(job))
+    await anotify(f"📄 Tailored (LOCAL, few QA keywords in listing) ready:\n{docx_path}\n🔗 {job.get('url')}")
+
+async def _tailor_batch(top_jobs: list) -> bool:
+    """Tailor all jobs with one batched LLM request. Returns False if the caller should go job by job."""
+    await anotify(f"✂️ Tailoring {len(top_jobs)} resumes in one batch request...")
+    try:
+        outputs = await asyncio.to_thread(tailor_many, [_job_fields(job) for job in top_jobs])
+    except Exception as e:
+        await anotify(f"⚠️ Batch tailoring failed: {str(e)[:200]}\nTailoring jobs one by one.")
+        return False
+    for job, (docx_path, pdf_path) in zip(top_jobs, outputs):
+        await anotify(f"📄 Tailored (OpenAI) ready:\n{docx_path}\n{pdf_path or 'PDF conversion skipped'}\n🔗 {job.get('url')}")
+    return True
+
+async def _tailor_one(job: dict):
+    """
+    Tailor a single job: OpenAI/HF first, local heuristic on any failure.
+    Returns (job, docx_path, pdf_path, err) where err is None if the API path worked.
+    """
+    fields = _job_fields(job)
     try:
-        send_message("🚀 Starting QA Job Apply Agent...")
+        docx_path, pdf_path = await tailor_and_save_async(*fields)
+        return job, docx_path, pdf_path, None
+    except Exception as e:
+        docx_path, pdf_path = await asyncio.to_thread(local_tailor_and_save, *fields)
+        return job, docx_path, pdf_path, str(e)
+
+async def main_async():
+    try:
+        # warm the model endpoints in the background; hidden behind resume prep + job search
+        warmup = asyncio.create_task(warm_up_models(sync_client=BATCH_TAILOR))
+        _background.add(warmup)
+        warmup.add_done_callback(_background.discard)
+        await anotify("🚀 Starting QA Job Apply Agent...")
         # Step 1: Ensure resume converted
         if not os.path.exists("data/base_resume.docx") and os.path.exists("data/Resume-ANURAJ.pdf"):
-            send_message("📄 Converting PDF → DOCX resume...")
-            convert_pdf_to_docx()
-            time.sleep(1)
+            await anotify("📄 Converting PDF → DOCX resume...")
+            await asyncio.to_thread(convert_pdf_to_docx)
+            await asyncio.sleep(1)
         else:
-            send_message("✅ Base resume ready.")
+            await anotify("✅ Base resume ready.")
 
         # Step 2: Job Search
-        send_message("🔍 Searching jobs (Bangalore / Remote)...")
-        jobs = search_jobs(query="QA Automation Engineer", location_keywords=["Bangalore", "Bengaluru", "Remote"], max_results=10)
+        await anotify("🔍 Searching jobs (Bangalore / Remote)...")
+        jobs = await asyncio.to_thread(search_jobs, query="QA Automation Engineer", location_keywords=["Bangalore", "Bengaluru", "Remote"], max_results=10)
         if not jobs:
-            send_message("❌ No jobs found this run.")
+            await anotify("❌ No jobs found this run.")
             return
-        send_message(f"✅ Found {len(jobs)} jobs. Tailoring top 3...")
-
-        # Step 3: Tailor resumes for top jobs
-        for i, job in enumerate(jobs[:3]):
-            title = job.get("title", "QA Engineer")
-            snippet = job.get("snippet", "")
-            company_name = job.get("title", "").split("-")[0].strip() or "Company"
-            send_message(f"✂️ Tailoring resume for *{title}*...")
-
-            # Try OpenAI-based tailoring first
-            try:
-                docx_path, pdf_path = tailor_and_save(title, company_name, snippet)
-                send_message(f"📄 Tailored (OpenAI) ready:\n{docx_path}\n{pdf_path or 'PDF conversion skipped'}\n🔗 {job.get('url')}")
-            except Exception as e:
-                err = str(e)
-                # Recognize quota / rate-limit message
-                if "insufficient_quota" in err or "RateLimitError" in err or "quota" in err.lower():
-                    send_message("⚠️ OpenAI quota exhausted or rate-limited. Falling back to local heuristic tailoring (free).")
-                    docx_path, pdf_path = local_tailor_and_save(title, company_name, snippet)
-                    send_message(f"📄 Tailored (LOCAL) ready:\n{docx_path}\n(Upload to GitHub Actions artifacts after run)\n🔗 {job.get('url')}")
-                else:
-                    # For other OpenAI errors, still fallback instead of crashing
-                    send_message(f"⚠️ OpenAI error: {err[:200]}\nFalling back to local tailoring.")
-                    docx_path, pdf_path = local_tailor_and_save(title, company_name, snippet)
-                    send_message(f"📄 Tailored (LOCAL) ready:\n{docx_path}\n🔗 {job.get('url')}")
-
-        send_message("✅ All done! Check output/resumes for files.")
+        # one entry per job_id: the same listing twice would write the same files concurrently
+        unique = {}
+        for job in jobs:
+            unique.setdefault(_job_fields(job)[3], job)
+        top_jobs = list(unique.values())[:TOP_N]
+        await anotify(f"✅ Found {len(jobs)} jobs. Tailoring top {len(top_jobs)}...")
+
+        # Step 3: cheap pre-filter, low-signal listings never reach the LLM
+        low_signal = [job for job in top_jobs if _keyword_hits(_job_fields(job)[2]) < MIN_KEYWORD_HITS]
+        top_jobs = [job for job in top_jobs if job not in low_signal]
+        for job in low_signal:
+            await _tailor_low_signal(job)
+
+        # Step 4: Tailor resumes for top jobs concurrently, report each as it finishes
+        if BATCH_TAILOR and len(top_jobs) > 1 and await _tailor_batch(top_jobs):
+            top_jobs = []
+        tasks = []
+        for job in top_jobs:
+            await anotify(f"✂️ Tailoring resume for *{job.get('title', 'QA Engineer')}*...")
+            tasks.append(asyncio.create_task(_tailor_one(job)))
+
+        for next_done in asyncio.as_completed(tasks):
+            job, docx_path, pdf_path, err = await next_done
+            if err is None:
+                await anotify(f"📄 Tailored (OpenAI) ready:\n{docx_path}\n{pdf_path or 'PDF conversion skipped'}\n🔗 {job.get('url')}")
+            # Recognize quota / rate-limit message
+            elif "insufficient_quota" in err or "RateLimitError" in err or "quota" in err.lower():
+                await anotify("⚠️ OpenAI quota exhausted or rate-limited. Falling back to local heuristic tailoring (free).")
+                await anotify(f"📄 Tailored (LOCAL) ready:\n{docx_path}\n(Upload to GitHub Actions artifacts after run)\n🔗 {job.get('url')}")
+            else:
+                # For other OpenAI errors, still fallback instead of crashing
+                await anotify(f"⚠️ OpenAI error: {err[:200]}\nFalling back to local tailoring.")
+                await anotify(f"📄 Tailored (LOCAL) ready:\n{docx_path}\n🔗 {job.get('url')}")
+
+        await anotify("✅ All done! Check output/resumes for files.")
     except Exception as e:
         tb = traceback.format_exc()
         msg = f"❌ Agent crashed with error:\n{e}\n\nTraceback:\n{tb[:3000]}"
         print(msg)
         try:
-            send_message(msg)
+            await anotify(msg)
         except:
             pass
+    finally:
+        await asyncio.to_thread(_batcher.flush)
+
+async def run_schedule(interval_hours: float):
+    """
+    Long-running mode: start main_async every interval_hours on one event loop.
+    The process sleeps between runs; a slow run may overlap the next one, but at
+    most MAX_OVERLAPPING_RUNS run at once (extra slots are skipped, not queued).
+    """
+    if not interval_hours > 0:  # also rejects NaN
+        raise ValueError(f"RUN_EVERY_HOURS must be greater than 0, got {interval_hours}")
+    running = set()
+    while True:
+        if len(running) < MAX_OVERLAPPING_RUNS:
+            task = asyncio.create_task(main_async())
+            running.add(task)
+            task.add_done_callback(running.discard)
+        else:
+            print("⚠️ Previous runs still in progress, skipping this slot.")
+        await asyncio.sleep(interval_hours * 3600)
+
+def main():
+    # RUN_EVERY_HOURS keeps the agent running on its own; unset = single run (GitHub Actions cron)
+    every = os.getenv("RUN_EVERY_HOURS")
+    asyncio.run(run_schedule(float(every)) if every else main_async())
 
 if __name__ == "__main__":
     main()
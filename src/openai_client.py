@@ -0,0 +1,37 @@
+"""
+Shared OpenAI clients – one pooled sync client per process, async clients on capped pools
+"""
+
+import os
+import httpx
+from openai import OpenAI, AsyncOpenAI
+from dotenv import load_dotenv
+
+load_dotenv()
+
+OPENAI_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_TIMEOUT = httpx.Timeout(60.0)
+
+# --- Sync client: imported by every module, so TCP/TLS connections are reused across calls ---
+client = None
+if OPENAI_KEY:
+    try:
+        client = OpenAI(api_key=OPENAI_KEY, http_client=httpx.Client(
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            timeout=OPENAI_TIMEOUT))
+    except Exception:
+        client = None
+
+
+def make_async_client(max_connections: int = 64):
+    """
+    New AsyncOpenAI on a capped httpx pool (unbounded pools degrade badly under
+    heavy fan-out), or None without an API key. Async pools belong to the event
+    loop that opened them, so callers keep one per loop.
+    """
+    if not OPENAI_KEY:
+        return None
+    return AsyncOpenAI(api_key=OPENAI_KEY, http_client=httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=max_connections,
+                            max_keepalive_connections=max(1, max_connections // 2)),
+        timeout=OPENAI_TIMEOUT))
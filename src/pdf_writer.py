@@ -0,0 +1,45 @@
+"""
+Fast PDF writer
+---------------
+Renders the tailored sections (summary / skills / experience bullets) straight
+to PDF with reportlab, so runs with FAST_PDF=1 need no LibreOffice at all.
+"""
+
+import os
+from xml.sax.saxutils import escape
+
+
+def render_pdf(sections: dict, out_pdf: str, title: str = None) -> str:
+    # imported lazily: reportlab is only needed when FAST_PDF=1
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, ListFlowable, ListItem
+
+    styles = getSampleStyleSheet()
+    story = []
+    if title:
+        story += [Paragraph(escape(title), styles["Title"]), Spacer(1, 8)]
+
+    if sections.get("summary"):
+        story.append(Paragraph("Profile Summary", styles["Heading2"]))
+        for line in sections["summary"].split("\n"):
+            if line.strip():
+                story.append(Paragraph(escape(line.strip()), styles["BodyText"]))
+        story.append(Spacer(1, 6))
+
+    if sections.get("skills"):
+        story.append(Paragraph("Core Competencies", styles["Heading2"]))
+        story.append(Paragraph(escape(", ".join(sections["skills"])), styles["BodyText"]))
+        story.append(Spacer(1, 6))
+
+    if sections.get("experience_updates"):
+        story.append(Paragraph("Experience Highlights", styles["Heading2"]))
+        story.append(ListFlowable(
+            [ListItem(Paragraph(escape(b), styles["BodyText"])) for b in sections["experience_updates"]],
+            bulletType="bullet",
+        ))
+
+    os.makedirs(os.path.dirname(out_pdf) or ".", exist_ok=True)
+    SimpleDocTemplate(out_pdf, pagesize=A4).build(story)
+    print(f"✅ Saved PDF (reportlab): {out_pdf}")
+    return out_pdf
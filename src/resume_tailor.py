@@ -7,44 +7,329 @@ or Hugging Face Gemma 2B (free) → outputs DOCX + PDF.
 
 import os
 import json
+import asyncio
 import re
+import time
+import random
+import atexit
+import shutil
+import socket
+import threading
+import zipfile
 import subprocess
 import requests
+import httpx
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from io import BytesIO
+from xml.sax.saxutils import escape
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import datetime
 from docx import Document
-from openai import OpenAI
+from docx.oxml import parse_xml
+from lxml import etree
+from src import llm_cache
+from src.openai_client import client, make_async_client
+from src.json_utils import loads, dumps
 
 # --- Environment setup ---
 from dotenv import load_dotenv
 load_dotenv()
 
-OPENAI_KEY = os.getenv("OPENAI_API_KEY")
 HF_KEY = os.getenv("HUGGINGFACE_API_KEY")
 
 BASE_DOCX = "data/base_resume.docx"
 OUT_DIR_RESUMES = "output/resumes"
 OUT_DIR_DESC = "output/descriptions"
-
-# --- Initialize OpenAI client if available ---
-client = None
-if OPENAI_KEY:
-    try:
-        client = OpenAI(api_key=OPENAI_KEY)
-    except Exception:
-        client = None
+# created once here rather than on every write
+os.makedirs(OUT_DIR_RESUMES, exist_ok=True)
+os.makedirs(OUT_DIR_DESC, exist_ok=True)
+
+HF_URL = "https://router.huggingface.co/hf-inference/models/google/gemma-2b-it"
+HF_RETRY_STATUS = (429, 500, 502, 503, 504)  # 503 = model still cold-starting
+HF_MAX_ATTEMPTS = 4
+
+# async OpenAI fan-out: concurrent requests and account rate limits (requests/tokens per minute)
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "500"))
+OPENAI_TPM = int(os.getenv("OPENAI_TPM", "200000"))
+
+# DOCX_SAFE=1 always edits through python-docx instead of patching document.xml
+DOCX_SAFE = os.getenv("DOCX_SAFE") == "1"
+# FAST_PDF=1 renders the PDF with reportlab instead of converting the DOCX via LibreOffice
+FAST_PDF = os.getenv("FAST_PDF") == "1"
+
+# unoserver keeps one headless soffice alive across conversions
+UNO_HOST = "127.0.0.1"
+UNO_PORT = int(os.getenv("UNOSERVER_PORT", "2003"))
+
+# --- Persistent HF session: one TLS connection reused across jobs, retries on cold start ---
+_HF_SESSION = requests.Session()
+_HF_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(total=HF_MAX_ATTEMPTS - 1, backoff_factor=1.0,
+                      status_forcelist=HF_RETRY_STATUS,
+                      allowed_methods=frozenset({"POST"}),
+                      raise_on_status=False),
+))
+if HF_KEY:
+    _HF_SESSION.headers["Authorization"] = f"Bearer {HF_KEY}"
+
+# --- Async clients (bound to the running event loop, rebuilt if it changes) ---
+class _RateLimiter:
+    """Async token bucket for the OpenAI requests/min and tokens/min limits."""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm, self.tpm = rpm, tpm
+        self.requests, self.tokens = float(rpm), float(tpm)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int):
+        tokens = min(tokens, self.tpm)
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                elapsed, self.updated = now - self.updated, now
+                self.requests = min(self.rpm, self.requests + elapsed * self.rpm / 60)
+                self.tokens = min(self.tpm, self.tokens + elapsed * self.tpm / 60)
+                if self.requests >= 1 and self.tokens >= tokens:
+                    self.requests -= 1
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep(0.05)
+
+
+_async_loop = None
+_async_http = None
+_async_openai = None
+_openai_sem = None
+_openai_limiter = None
+
+
+def _async_clients():
+    """Return (httpx.AsyncClient, AsyncOpenAI | None) shared by every task on this loop."""
+    global _async_loop, _async_http, _async_openai, _openai_sem, _openai_limiter
+    loop = asyncio.get_running_loop()
+    if _async_loop is not loop:
+        _async_http = httpx.AsyncClient(http2=True, limits=httpx.Limits(max_connections=32))
+        _async_openai = make_async_client(max_connections=OPENAI_MAX_CONCURRENCY * 2)
+        _openai_sem = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+        _openai_limiter = _RateLimiter(OPENAI_RPM, OPENAI_TPM)
+        _async_loop = loop
+    return _async_http, _async_openai
+
+
+@asynccontextmanager
+async def _openai_slot(kwargs: dict):
+    """Hold one of OPENAI_MAX_CONCURRENCY slots and wait for RPM/TPM budget before a request."""
+    _async_clients()
+    # rough token estimate: ~4 chars per prompt token plus the completion budget
+    est_tokens = sum(len(m["content"]) for m in kwargs["messages"]) // 4 + kwargs.get("max_tokens", 0)
+    async with _openai_sem:
+        await _openai_limiter.acquire(est_tokens)
+        yield
 
 # --- Utility ---
+_SANITIZE_RE = re.compile(r"[^\w\-]+")
+_UNDERSCORE_RE = re.compile(r"__+")
+
+
 def sanitize_name(name: str) -> str:
-    s = re.sub(r"[^\w\-]+", "_", name.strip())
-    s = re.sub(r"__+", "_", s)
-    return s.strip("_")[:120]
+    return _UNDERSCORE_RE.sub("_", _SANITIZE_RE.sub("_", name.strip())).strip("_")[:120]
+
+
+# --- Base resume cache (keyed by mtime, so edits to the file are picked up) ---
+_DOC_XML = "word/document.xml"
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_NS = {"w": _W[1:-1]}
+# compiled once: body-level paragraphs (same set/order as python-docx's doc.paragraphs) and the
+# content of the paragraph's own runs; text boxes and drawings nested in a run are not descended into
+_XP_BODY_PARAGRAPHS = etree.XPath("/w:document/w:body/w:p", namespaces=_NS)
+# every paragraph of the body, table cells included, minus text-box copies (w:txbxContent)
+_XP_ALL_PARAGRAPHS = etree.XPath("/w:document/w:body//w:p[not(ancestor::w:txbxContent)]", namespaces=_NS)
+_XP_RUN_CONTENT = etree.XPath("./w:r/* | ./w:hyperlink/w:r/*", namespaces=_NS)
+# run children python-docx's Run.text renders as characters (w:t carries its own text)
+_RUN_CHARS = {_W + "tab": "\t", _W + "ptab": "\t", _W + "cr": "\n", _W + "noBreakHyphen": "-"}
+_BR_NEWLINE_TYPES = (None, "textWrapping")
+
+
+def _paragraph_text(p) -> str:
+    """Paragraph.text without python-docx: run text with w:br → newline and w:tab → tab."""
+    parts = []
+    for el in _XP_RUN_CONTENT(p):
+        if el.tag == _W + "t":
+            parts.append(el.text or "")
+        elif el.tag == _W + "br":
+            if el.get(_W + "type") in _BR_NEWLINE_TYPES:
+                parts.append("\n")
+        else:
+            parts.append(_RUN_CHARS.get(el.tag, ""))
+    return "".join(parts)
+
+@lru_cache(maxsize=4)
+def _load_base(path: str, mtime: float) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@lru_cache(maxsize=4)
+def _base_root(path: str, mtime: float):
+    """Parsed word/document.xml of the base resume, shared by every text/heading helper below."""
+    with zipfile.ZipFile(BytesIO(_load_base(path, mtime))) as z:
+        return etree.fromstring(z.read(_DOC_XML))
+
+
+@lru_cache(maxsize=4)
+def _base_texts(path: str, mtime: float) -> tuple:
+    """Body paragraph texts, index-aligned with and equal to doc.paragraphs' .text, via compiled XPath."""
+    return tuple(_paragraph_text(p) for p in _XP_BODY_PARAGRAPHS(_base_root(path, mtime)))
+
+
+@lru_cache(maxsize=4)
+def _base_lower_texts(path: str, mtime: float) -> tuple:
+    return tuple(t.lower().strip() for t in _base_texts(path, mtime))
+
+
+@lru_cache(maxsize=4)
+def _xml_paragraph_texts(path: str, mtime: float) -> tuple:
+    """Read-only texts of every body and table-cell paragraph, straight from word/document.xml."""
+    return tuple(_paragraph_text(p) for p in _XP_ALL_PARAGRAPHS(_base_root(path, mtime)))
+
+
+@lru_cache(maxsize=4)
+def _extract_docx_text(path: str, mtime: float) -> str:
+    return "\n".join(t for t in _xml_paragraph_texts(path, mtime) if t.strip())
+
+
+def base_resume_bytes(path=BASE_DOCX) -> bytes:
+    """Raw DOCX bytes of the base resume, read from disk once per mtime."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Base resume not found: {path}")
+    return _load_base(path, os.path.getmtime(path))
 
 
 def extract_docx_text(path=BASE_DOCX) -> str:
     if not os.path.exists(path):
         raise FileNotFoundError(f"Base resume not found: {path}")
-    doc = Document(path)
-    return "\n".join(p.text for p in doc.paragraphs if p.text.strip())
+    return _extract_docx_text(path, os.path.getmtime(path))
+
+
+# --- Distilled base profile (what the prompt actually needs, ~1 KB) ---
+_PROFILE_SECTIONS = {
+    "SUMMARY": ("profile summary", "summary", "profile", "objective"),
+    "SKILLS": ("core competencies", "skills", "competencies"),
+    "EXPERIENCE": ("experience", "employment"),
+    "PROJECTS": ("projects",),
+}
+# includes the Symbol/Wingdings private-use glyphs PDF converters emit for list bullets
+_BULLET_CHARS = "•●▪◦‣-–*\uf0b7\uf0a7\uf0d8"
+_SECTION_MAX_CHARS = 600
+# an EXPERIENCE section shorter than this is a mis-parse, not a career
+_EXPERIENCE_MIN_CHARS = 200
+# hard cap on the distilled profile (0 = no cap); ~4 chars per token
+BASE_TEXT_MAX_CHARS = int(os.getenv("BASE_TEXT_MAX_CHARS", 3000))
+_WS_RE = re.compile(r"\s+")
+# e-mail, links and phone numbers: useless to the model, and they cost tokens on every call
+_CONTACT_RE = re.compile(
+    r"@|https?://|www\.|linkedin\.com|github\.com|\+\d[\d\s().-]{7,}\d|\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}",
+    re.I,
+)
+
+
+# headings that end a profile section (the resume's other blocks)
+_OTHER_HEADINGS = ("education", "certification", "contact", "languages", "achievements", "awards",
+                   "interests", "hobbies", "references", "personal details", "declaration",
+                   "publications", "training", "courses")
+
+
+def _heading_text(line: str):
+    """Lowercased text of a line shaped like a heading (short, few words, not a bullet or sentence), else None."""
+    if line[0] in _BULLET_CHARS or line.endswith(".") or len(line) > 40:
+        return None
+    low = line.lower().strip(" :")
+    return low if len(low.split()) <= 4 else None
+
+
+def _section_of(line: str):
+    """Return the profile section a heading line opens, "" for any other known heading, else None."""
+    low = _heading_text(line)
+    if low is None:
+        return None
+    for name, keywords in _PROFILE_SECTIONS.items():
+        if any(k in low for k in keywords):
+            return name
+    if any(k in low for k in _OTHER_HEADINGS):
+        return ""
+    return None
+
+
+def _clip(text: str, limit: int) -> str:
+    """Cut text to at most limit chars on a word boundary."""
+    return text if len(text) <= limit else text[:limit].rsplit(" ", 1)[0]
+
+
+def _first_bullets(lines: list) -> list:
+    """Keep each role/project line plus its first bullet."""
+    kept, want_bullet = [], False
+    for line in lines:
+        if line[0] in _BULLET_CHARS:
+            if want_bullet:
+                kept.append(line)
+                want_bullet = False
+        else:
+            kept.append(line)
+            want_bullet = True
+    return kept
+
+
+@lru_cache(maxsize=4)
+def _distilled_base(path: str, mtime: float) -> str:
+    lines = [_WS_RE.sub(" ", t).strip() for t in _xml_paragraph_texts(path, mtime)]
+    # drop empty and bullet-glyph-only paragraphs, and contact details
+    lines = [line for line in lines if line.strip(_BULLET_CHARS + " ") and not _CONTACT_RE.search(line)]
+    sections = {name: [] for name in _PROFILE_SECTIONS}
+    current = None
+    for line in lines:
+        heading = _section_of(line)
+        if heading is not None:
+            current = heading or None  # education, contact, ... end the section
+        elif current:
+            sections[current].append(line)
+
+    # table/column layouts (e.g. pdf2docx output) have no body-level headings and interleave
+    # the columns, so the line-by-line section walk mislabels them
+    recognised = (
+        _base_heading_index(path, mtime)
+        and sections["SUMMARY"]
+        and len(" ".join(sections["EXPERIENCE"])) >= _EXPERIENCE_MIN_CHARS
+    )
+    if not recognised:
+        # send the full (contact-free) text uncapped rather than a hollow or mislabelled profile
+        return "\n".join(lines)
+
+    parts = [
+        "SUMMARY: " + _clip(" ".join(sections["SUMMARY"]), _SECTION_MAX_CHARS),
+        "SKILLS: " + _clip(" ".join(sections["SKILLS"]), _SECTION_MAX_CHARS),
+        "EXPERIENCE_BULLETS:",
+        *_first_bullets(sections["EXPERIENCE"]),
+    ]
+    if sections["PROJECTS"]:
+        parts += ["PROJECTS:", *_first_bullets(sections["PROJECTS"])]
+    text = "\n".join(parts)
+    if BASE_TEXT_MAX_CHARS and len(text) > BASE_TEXT_MAX_CHARS:
+        text = text[:BASE_TEXT_MAX_CHARS].rsplit("\n", 1)[0]
+    return text
+
+
+def distilled_base_text(path=BASE_DOCX) -> str:
+    """Compact summary/skills/experience profile of the base resume, used as the prompt's base text."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Base resume not found: {path}")
+    return _distilled_base(path, os.path.getmtime(path))
 
 
 PROMPT_TEMPLATE = """
@@ -68,27 +353,54 @@ Job Description:
 \"\"\"{job_desc}\"\"\"
 """
 
-# --- Hugging Face Fallback ---
-def hf_tailor_request(base_text, job_title, job_desc):
-    if not HF_KEY:
-        raise RuntimeError("Hugging Face API key not set in .env")
+JOB_DESC_MAX_CHARS = 1200
 
-    url = "https://router.huggingface.co/hf-inference/models/google/gemma-2b-it"
-    headers = {"Authorization": f"Bearer {HF_KEY}"}
 
-    prompt = PROMPT_TEMPLATE.format(base_text=base_text, job_title=job_title, job_desc=job_desc)
-    payload = {
-        "inputs": prompt,
-        "parameters": {"max_new_tokens": 512, "temperature": 0.4}
-    }
+def build_prompt(base_text: str, job_title: str, job_desc: str) -> str:
+    return PROMPT_TEMPLATE.format(base_text=base_text, job_title=job_title,
+                                  job_desc=(job_desc or "")[:JOB_DESC_MAX_CHARS])
 
-    try:
-        r = requests.post(url, headers=headers, json=payload, timeout=120)
-        r.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        raise RuntimeError(f"Hugging Face request failed: {e}")
 
-    data = r.json()
+BATCH_PROMPT_TEMPLATE = """
+You are an expert resume writer and ATS optimizer for QA Automation roles.
+
+Given:
+1) Base resume text.
+2) A list of jobs, each with an index "i", a title and a short description (snippet).
+
+Task:
+- For EVERY job return one entry: "i", "summary", "skills" (array), "experience_updates" (array of bullets).
+- Return JSON shaped as {{"results": [{{"i": 0, "summary": ..., "skills": [...], "experience_updates": [...]}}, ...]}}.
+- Use truthful info, tailor language for ATS, avoid fake employers.
+- Keep concise and relevant (max 6 bullets/skills per job).
+
+INPUT:
+Base Resume:
+\"\"\"{base_text}\"\"\"
+
+Jobs:
+{jobs_json}
+"""
+
+
+def build_batch_prompt(base_text: str, jobs: list) -> str:
+    """jobs: list of (job_title, job_desc); the base resume is sent once for all of them."""
+    listed = [{"i": i, "title": title, "desc": (desc or "")[:JOB_DESC_MAX_CHARS]}
+              for i, (title, desc) in enumerate(jobs)]
+    return BATCH_PROMPT_TEMPLATE.format(base_text=base_text,
+                                        jobs_json=dumps(listed).decode("utf-8"))
+
+
+# --- Hugging Face Fallback ---
+def _extract_json(content: str) -> dict:
+    """Parse the outermost {...} block of a free-text model reply (HF has no JSON mode)."""
+    start, end = content.find("{"), content.rfind("}")
+    if start < 0 or end < start:
+        raise ValueError("no JSON object in model output")
+    return loads(content[start:end + 1])
+
+
+def _parse_hf_output(data) -> dict:
     if isinstance(data, list) and len(data) and "generated_text" in data[0]:
         content = data[0]["generated_text"]
     elif isinstance(data, dict) and "generated_text" in data:
@@ -97,7 +409,7 @@ def hf_tailor_request(base_text, job_title, job_desc):
         content = str(data)
 
     try:
-        return json.loads(re.search(r"(\{.*\})", content, flags=re.S).group(1))
+        return _extract_json(content)
     except Exception:
         return {
             "summary": "Tailored summary (HF Gemma fallback).",
@@ -105,19 +417,98 @@ def hf_tailor_request(base_text, job_title, job_desc):
             "experience_updates": ["Adapted resume using free Hugging Face API."]
         }
 
+
+def _hf_payload(base_text, job_title, job_desc) -> dict:
+    prompt = build_prompt(base_text, job_title, job_desc)
+    return {
+        "inputs": prompt,
+        "parameters": {"max_new_tokens": 512, "temperature": 0.4}
+    }
+
+
+def hf_tailor_request(base_text, job_title, job_desc):
+    if not HF_KEY:
+        raise RuntimeError("Hugging Face API key not set in .env")
+
+    payload = _hf_payload(base_text, job_title, job_desc)
+
+    try:
+        r = _HF_SESSION.post(HF_URL, json=payload, timeout=120)
+        r.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        raise RuntimeError(f"Hugging Face request failed: {e}")
+
+    return _parse_hf_output(r.json())
+
+
+async def hf_tailor_request_async(base_text, job_title, job_desc):
+    if not HF_KEY:
+        raise RuntimeError("Hugging Face API key not set in .env")
+
+    http, _ = _async_clients()
+    headers = {"Authorization": f"Bearer {HF_KEY}"}
+    payload = _hf_payload(base_text, job_title, job_desc)
+
+    for attempt in range(1, HF_MAX_ATTEMPTS + 1):
+        try:
+            r = await http.post(HF_URL, headers=headers, json=payload, timeout=120)
+            if r.status_code not in HF_RETRY_STATUS or attempt == HF_MAX_ATTEMPTS:
+                r.raise_for_status()
+                break
+        except httpx.TimeoutException as e:
+            if attempt == HF_MAX_ATTEMPTS:
+                raise RuntimeError(f"Hugging Face request failed: {e}")
+        except httpx.HTTPError as e:
+            raise RuntimeError(f"Hugging Face request failed: {e}")
+        # model cold start (503) or timeout: exponential backoff with jitter, capped at 10 s
+        await asyncio.sleep(min(10, 2 ** (attempt - 1)) + random.uniform(0, 1))
+
+    return _parse_hf_output(r.json())
+
+async def warm_up_models(sync_client: bool = False):
+    """
+    Fire-and-forget: nudge the HF endpoint out of its cold start and open the
+    OpenAI TLS connection while the job search runs. Errors are ignored.
+    sync_client=True warms the pooled sync client (used by tailor_many)
+    instead of this loop's async one.
+    """
+    http, aclient = _async_clients()
+    calls = []
+    if HF_KEY:
+        calls.append(http.post(HF_URL, headers={"Authorization": f"Bearer {HF_KEY}"},
+                               json={"inputs": "x", "parameters": {"max_new_tokens": 1}}, timeout=5))
+    if sync_client:
+        if client:
+            calls.append(asyncio.to_thread(client.models.list))
+    elif aclient:
+        calls.append(aclient.models.list())
+    await asyncio.gather(*calls, return_exceptions=True)
+
 # --- OpenAI or fallback ---
+def _openai_kwargs(base_text: str, job_title: str, job_desc: str) -> dict:
+    prompt = build_prompt(base_text, job_title, job_desc)
+    return dict(
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.1,
+        max_tokens=700,
+        # JSON mode: the reply is always a parseable object, no extraction needed
+        response_format={"type": "json_object"},
+    )
+
+
 def request_tailored_sections(base_text: str, job_title: str, job_desc: str) -> dict:
     if client:
         try:
-            prompt = PROMPT_TEMPLATE.format(base_text=base_text, job_title=job_title, job_desc=job_desc)
-            resp = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.1,
-                max_tokens=700,
-            )
-            content = resp.choices[0].message.content
-            return json.loads(re.search(r"(\{.*\})", content, flags=re.S).group(1))
+            kwargs = _openai_kwargs(base_text, job_title, job_desc)
+            key = llm_cache.make_key(kwargs)
+            cached = llm_cache.get(key)
+            if cached is not None:
+                return cached
+            resp = client.chat.completions.create(**kwargs)
+            updates = loads(resp.choices[0].message.content)
+            llm_cache.put(key, updates)
+            return updates
         except Exception as e:
             print("⚠️ OpenAI error, falling back to Hugging Face:", e)
 
@@ -125,43 +516,347 @@ def request_tailored_sections(base_text: str, job_title: str, job_desc: str) ->
     return hf_tailor_request(base_text, job_title, job_desc)
 
 
+async def request_tailored_sections_async(base_text: str, job_title: str, job_desc: str) -> dict:
+    _, aclient = _async_clients()
+    if aclient:
+        try:
+            kwargs = _openai_kwargs(base_text, job_title, job_desc)
+            key = llm_cache.make_key(kwargs)
+            cached = llm_cache.get(key)
+            if cached is not None:
+                return cached
+            async with _openai_slot(kwargs):
+                resp = await aclient.chat.completions.create(**kwargs)
+            updates = loads(resp.choices[0].message.content)
+            llm_cache.put(key, updates)
+            return updates
+        except Exception as e:
+            print("⚠️ OpenAI error, falling back to Hugging Face:", e)
+
+    # fallback route
+    return await hf_tailor_request_async(base_text, job_title, job_desc)
+
+
+_RESULTS_ARRAY_RE = re.compile(r'"results"\s*:\s*\[')
+_JSON_DECODER = json.JSONDecoder()
+
+
+class _ResultsScanner:
+    """Pull each complete item of a streamed {"results": [...]} reply out as soon as it closes."""
+
+    def __init__(self):
+        self.buf = ""
+        self.pos = None  # just past the last decoded item, once the array has opened
+
+    def feed(self, text: str) -> list:
+        self.buf += text
+        if self.pos is None:
+            m = _RESULTS_ARRAY_RE.search(self.buf)
+            if not m:
+                return []
+            self.pos = m.end()
+        elif "}" not in text:
+            return []  # no item can have completed
+        items = []
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n,":
+                self.pos += 1
+            if self.pos >= len(self.buf) or self.buf[self.pos] != "{":
+                return items
+            try:
+                item, self.pos = _JSON_DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                return items  # item still incomplete
+            items.append(item)
+
+
+def _stream_batch_entries(kwargs: dict, key: str):
+    """Yield batch result entries while the completion streams in, then cache the full reply."""
+    scanner = _ResultsScanner()
+    for chunk in client.chat.completions.create(**kwargs, stream=True):
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            yield from scanner.feed(delta)
+    data = loads(scanner.buf)
+    llm_cache.put(key, data)
+    yield from data.get("results", [])  # duplicates of streamed items are skipped by the caller
+
+
+def iter_tailored_sections_batch(base_text: str, jobs: list):
+    """
+    Tailor several jobs with ONE streamed OpenAI request. jobs: list of (job_title, job_desc).
+    Yields (index, sections) as soon as each job's entry is complete, so callers
+    can write files while the model is still generating. Jobs the model skipped
+    (or every job, if the batch call fails) go through request_tailored_sections.
+    """
+    done = set()
+    if client and jobs:
+        try:
+            kwargs = dict(
+                model="gpt-4o-mini",
+                messages=[{"role": "user", "content": build_batch_prompt(base_text, jobs)}],
+                temperature=0.1,
+                max_tokens=min(700 * len(jobs), 8000),
+                response_format={"type": "json_object"},
+            )
+            key = llm_cache.make_key(kwargs)
+            data = llm_cache.get(key)
+            entries = data.get("results", []) if data is not None else _stream_batch_entries(kwargs, key)
+            for entry in entries:
+                i = entry.get("i")
+                if isinstance(i, int) and 0 <= i < len(jobs) and i not in done:
+                    done.add(i)
+                    yield i, {k: entry[k] for k in ("summary", "skills", "experience_updates") if k in entry}
+        except Exception as e:
+            print("⚠️ OpenAI batch error, tailoring remaining jobs one by one:", e)
+
+    for i, (job_title, job_desc) in enumerate(jobs):
+        if i not in done:
+            yield i, request_tailored_sections(base_text, job_title, job_desc)
+
+
+def request_tailored_sections_batch(base_text: str, jobs: list) -> dict:
+    """Non-streaming view of iter_tailored_sections_batch: {index: sections}."""
+    return dict(iter_tailored_sections_batch(base_text, jobs))
+
+
 # --- Apply tailored updates ---
-def apply_updates_to_docx(out_docx_path: str, updates: dict):
-    doc = Document(BASE_DOCX)
-
-    def replace_section(heading_keywords, new_lines):
-        lower = [p.text.lower().strip() for p in doc.paragraphs]
-        for idx, text in enumerate(lower):
-            if any(h in text for h in heading_keywords):
-                for i, line in enumerate(new_lines):
-                    pos = idx + 1 + i
-                    if pos < len(doc.paragraphs):
-                        doc.paragraphs[pos].text = line
-                    else:
-                        doc.add_paragraph(line)
-                return
+_BODY_P_RE = re.compile(r"<w:p\b[^>]*?(?:/>|>.*?</w:p>)", re.S)
+_P_OPEN_RE = re.compile(r"<w:p\b[^>]*?/?>")
+_PPR_RE = re.compile(r"<w:pPr\b[^>]*?(?:/>|>.*?</w:pPr>)", re.S)
+# structures where regex paragraph spans stop matching python-docx's doc.paragraphs
+_UNSUPPORTED_XML = ("<w:tbl>", "<w:tbl ", "<w:txbxContent", "<w:sdt>", "<w:sdt ")
+
+
+@lru_cache(maxsize=4)
+def _base_xml_paragraphs(path: str, mtime: float):
+    """
+    Return (document_xml, [(start, end), ...]) for the body paragraphs of the
+    base resume, or None when the layout is too complex for in-place patching.
+    """
+    with zipfile.ZipFile(BytesIO(_load_base(path, mtime))) as z:
+        xml = z.read(_DOC_XML).decode("utf-8")
+    if "<w:body>" not in xml or any(tag in xml for tag in _UNSUPPORTED_XML):
+        return None
+    spans = [m.span() for m in _BODY_P_RE.finditer(xml)]
+    if len(spans) != len(_base_lower_texts(path, mtime)):
+        return None
+    return xml, spans
+
+
+def _run_xml(text: str) -> str:
+    """Single <w:r> for text, mirroring python-docx's Paragraph.text setter (\t → tab, \n → break)."""
+    parts = []
+    for i, line in enumerate(text.split("\n")):
+        if i:
+            parts.append("<w:br/>")
+        for j, chunk in enumerate(line.split("\t")):
+            if j:
+                parts.append("<w:tab/>")
+            if chunk:
+                parts.append(f'<w:t xml:space="preserve">{escape(chunk)}</w:t>')
+    return "<w:r>" + "".join(parts) + "</w:r>"
+
+
+def _replace_paragraph_xml(p_xml: str, text: str) -> str:
+    """Drop every run of a <w:p> but keep its properties, then add one run with text."""
+    open_tag = _P_OPEN_RE.match(p_xml).group(0)
+    ppr = ""
+    if not open_tag.endswith("/>"):
+        m = _PPR_RE.match(p_xml, len(open_tag))
+        ppr = m.group(0) if m else ""
+    else:
+        open_tag = open_tag[:-2].rstrip() + ">"
+    return open_tag + ppr + _run_xml(text) + "</w:p>"
+
+
+_W_PPR = _W + "pPr"
+_RUN_OPEN = f'<w:r xmlns:w="{_NS["w"]}">'
+
+
+def _set_text_fast(p, text: str):
+    """Same result as python-docx's `p.text = text`, built with one parse instead of per-run API calls."""
+    p_el = p._p
+    for child in list(p_el):
+        if child.tag != _W_PPR:
+            p_el.remove(child)
+    p_el.append(parse_xml(_RUN_OPEN + _run_xml(text)[len("<w:r>"):]))
+
+
+def _patch_docx_xml(out_docx_path: str, replacements: dict, appended: list) -> bool:
+    """Fast path: splice the edits into word/document.xml and re-zip. False if unsupported."""
+    mtime = os.path.getmtime(BASE_DOCX)
+    base = _base_xml_paragraphs(BASE_DOCX, mtime)
+    if base is None:
+        return False
+    xml, spans = base
+
+    out, last = [], 0
+    for idx in sorted(replacements):
+        start, end = spans[idx]
+        out.append(xml[last:start])
+        out.append(_replace_paragraph_xml(xml[start:end], replacements[idx]))
+        last = end
+    out.append(xml[last:])
+    new_xml = "".join(out)
+
+    if appended:
+        # python-docx adds paragraphs just before the body-level <w:sectPr>
+        new_p = "".join(f"<w:p>{_run_xml(line)}</w:p>" for line in appended)
+        at = new_xml.rfind("<w:sectPr")
+        if at < new_xml.rfind("</w:p>"):
+            at = new_xml.rfind("</w:body>")
+        new_xml = new_xml[:at] + new_p + new_xml[at:]
+
+    with zipfile.ZipFile(BytesIO(_load_base(BASE_DOCX, mtime))) as zin, \
+            zipfile.ZipFile(out_docx_path, "w", zipfile.ZIP_DEFLATED, compresslevel=6) as zout:
+        for item in zin.infolist():
+            data = new_xml.encode("utf-8") if item.filename == _DOC_XML else zin.read(item.filename)
+            zout.writestr(item, data, compress_type=zipfile.ZIP_DEFLATED, compresslevel=6)
+    return True
+
+
+# section -> heading aliases looked up in the base resume (first matching paragraph wins)
+_UPDATE_HEADINGS = {
+    "summary": ("profile summary", "summary"),
+    "skills": ("core competencies", "skills"),
+}
+
+
+def _heading_index(lower_texts) -> dict:
+    """One pass over the paragraphs: section -> index of its first heading paragraph."""
+    found = {}
+    pending = dict(_UPDATE_HEADINGS)
+    for idx, text in enumerate(lower_texts):
+        for section, aliases in list(pending.items()):
+            if any(h in text for h in aliases):
+                found[section] = idx
+                del pending[section]
+        if not pending:
+            break
+    return found
+
+
+@lru_cache(maxsize=4)
+def _base_heading_index(path: str, mtime: float) -> dict:
+    return _heading_index(_base_lower_texts(path, mtime))
+
+
+def base_heading_index(path=BASE_DOCX) -> dict:
+    """Section ("summary", "skills") -> heading paragraph index in the base resume, cached per mtime."""
+    return _base_heading_index(path, os.path.getmtime(path))
+
+
+def apply_updates_to_docx(out_docx_path: str, updates: dict, lower_texts=None, safe: bool = DOCX_SAFE):
+    """
+    Write the tailored sections into a copy of BASE_DOCX.
+    lower_texts: lowercased paragraph texts of the base resume; computed (and
+    cached per mtime) when not given. Headings are matched against the base
+    text, not against lines already written by an earlier section.
+    Simple layouts are patched directly in word/document.xml; tables, text
+    boxes, content controls or safe=True go through python-docx.
+    """
+    mtime = os.path.getmtime(BASE_DOCX)
+    if lower_texts is None:
+        lower_texts = _base_lower_texts(BASE_DOCX, mtime)
+        heading_idx = _base_heading_index(BASE_DOCX, mtime)
+    else:
+        heading_idx = _heading_index(lower_texts)
+    n_paragraphs = len(lower_texts)
+
+    # plan edits first: paragraph index -> new text, plus lines appended at the end
+    replacements, appended = {}, []
+
+    def replace_section(section, new_lines):
+        idx = heading_idx.get(section)
+        if idx is None:
+            return
+        for i, line in enumerate(new_lines):
+            pos = idx + 1 + i
+            if pos < n_paragraphs:
+                replacements[pos] = line
+            else:
+                appended.append(line)
 
     if updates.get("summary"):
         lines = [l.strip() for l in updates["summary"].split("\n") if l.strip()]
-        replace_section(["profile summary", "summary"], lines)
+        replace_section("summary", lines)
 
     if updates.get("skills"):
-        replace_section(["core competencies", "skills"], [", ".join(updates["skills"])])
+        replace_section("skills", [", ".join(updates["skills"])])
 
     if updates.get("experience_updates"):
         for bullet in updates["experience_updates"]:
-            doc.add_paragraph("- " + bullet)
-
-    os.makedirs(os.path.dirname(out_docx_path), exist_ok=True)
-    doc.save(out_docx_path)
+            appended.append("- " + bullet)
+
+    if safe or not _patch_docx_xml(out_docx_path, replacements, appended):
+        doc = Document(BytesIO(_load_base(BASE_DOCX, mtime)))
+        paragraphs = doc.paragraphs  # built once; indexed directly below
+        for pos, line in replacements.items():
+            _set_text_fast(paragraphs[pos], line)
+        for line in appended:
+            doc.add_paragraph(line)
+        doc.save(out_docx_path)
     print(f"✅ Saved tailored DOCX: {out_docx_path}")
 
 
+# --- DOCX → PDF ---
+_uno_lock = threading.Lock()
+_uno_proc = None
+_uno_failed = False
+
+
+def _stop_unoserver():
+    if _uno_proc is not None and _uno_proc.poll() is None:
+        _uno_proc.terminate()
+        try:
+            _uno_proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            _uno_proc.kill()
+
+
+def _ensure_unoserver(startup_timeout: float = 30.0) -> bool:
+    """
+    Start a persistent `unoserver` daemon on first use so conversions skip the
+    LibreOffice cold start. Returns False if unoserver is not installed or did
+    not come up, in which case callers fall back to `libreoffice --convert-to`.
+    """
+    global _uno_proc, _uno_failed
+    with _uno_lock:
+        if _uno_proc is not None and _uno_proc.poll() is None:
+            return True
+        if _uno_failed or not (shutil.which("unoserver") and shutil.which("unoconvert")):
+            return False
+
+        _uno_proc = subprocess.Popen(
+            ["unoserver", "--interface", UNO_HOST, "--port", str(UNO_PORT)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        atexit.register(_stop_unoserver)
+
+        deadline = time.time() + startup_timeout
+        while time.time() < deadline and _uno_proc.poll() is None:
+            try:
+                socket.create_connection((UNO_HOST, UNO_PORT), timeout=1).close()
+                return True
+            except OSError:
+                time.sleep(0.5)
+
+        print("⚠️ unoserver did not start, using one-shot LibreOffice conversions.")
+        _stop_unoserver()
+        _uno_failed = True
+        return False
+
+
 def convert_docx_to_pdf(docx_path):
     if not os.path.exists(docx_path):
         raise FileNotFoundError(docx_path)
     pdf_path = docx_path.rsplit(".", 1)[0] + ".pdf"
-    cmd = ["libreoffice", "--headless", "--convert-to", "pdf", "--outdir", os.path.dirname(docx_path), docx_path]
+    if _ensure_unoserver():
+        cmd = ["unoconvert", "--host", UNO_HOST, "--port", str(UNO_PORT),
+               "--convert-to", "pdf", docx_path, pdf_path]
+    else:
+        cmd = ["libreoffice", "--headless", "--convert-to", "pdf", "--outdir", os.path.dirname(docx_path), docx_path]
     try:
         subprocess.check_call(cmd)
         print(f"✅ Saved PDF: {pdf_path}")
@@ -171,27 +866,147 @@ def convert_docx_to_pdf(docx_path):
     return pdf_path
 
 
-def tailor_and_save(job_title: str, company_name: str, job_desc: str):
-    base_text = extract_docx_text(BASE_DOCX)
-    updates = request_tailored_sections(base_text, job_title, job_desc)
-
+def convert_many_docx_to_pdf(docx_paths: list) -> list:
+    """
+    Convert several DOCX files, paying the LibreOffice start-up at most once:
+    through the unoserver daemon if it is up, otherwise with one
+    `libreoffice --convert-to pdf a.docx b.docx ...` call per output folder.
+    Returns PDF paths in input order (None where conversion failed).
+    """
+    if _ensure_unoserver():
+        return [convert_docx_to_pdf(p) for p in docx_paths]
+
+    by_dir = {}
+    for path in docx_paths:
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        by_dir.setdefault(os.path.dirname(path), []).append(path)
+        # drop PDFs from earlier runs so a failed conversion is not reported as success
+        stale = path.rsplit(".", 1)[0] + ".pdf"
+        if os.path.exists(stale):
+            os.remove(stale)
+    for outdir, paths in by_dir.items():
+        cmd = ["libreoffice", "--headless", "--convert-to", "pdf", "--outdir", outdir, *paths]
+        try:
+            subprocess.check_call(cmd)
+        except Exception as e:
+            print("⚠️ PDF conversion failed:", e)
+
+    pdf_paths = []
+    for path in docx_paths:
+        pdf_path = path.rsplit(".", 1)[0] + ".pdf"
+        if os.path.exists(pdf_path):
+            print(f"✅ Saved PDF: {pdf_path}")
+            pdf_paths.append(pdf_path)
+        else:
+            pdf_paths.append(None)
+    return pdf_paths
+
+
+def _prepare_outputs(job_title: str, company_name: str, job_desc: str, job_id: str = None):
+    """
+    Write the job description file and return the output DOCX path.
+    job_id keeps names unique when several jobs share a company/title and are written concurrently.
+    """
     clean_name = sanitize_name(company_name or job_title)
+    if job_id:
+        clean_name += "_" + sanitize_name(str(job_id))
     fname = f"Anuraj_{clean_name}"
 
     out_docx = os.path.join(OUT_DIR_RESUMES, fname + ".docx")
     out_desc = os.path.join(OUT_DIR_DESC, f"{clean_name}_description.txt")
 
-    os.makedirs(OUT_DIR_RESUMES, exist_ok=True)
-    os.makedirs(OUT_DIR_DESC, exist_ok=True)
-
     with open(out_desc, "w", encoding="utf-8") as f:
         f.write(job_desc)
+    return out_docx
+
+
+def _render_fast_pdf(out_docx: str, updates: dict):
+    """FAST_PDF path: reportlab straight from the sections, no LibreOffice."""
+    try:
+        from src.pdf_writer import render_pdf
+        name_line = extract_docx_text(BASE_DOCX).split("\n", 1)[0]
+        return render_pdf(updates, out_docx.rsplit(".", 1)[0] + ".pdf", title=name_line)
+    except Exception as e:
+        print("⚠️ PDF rendering failed:", e)
+        return None
+
+
+def _write_resume(out_docx: str, updates: dict):
+    """Save the tailored DOCX and its PDF. Returns the PDF path (None if conversion failed)."""
+    apply_updates_to_docx(out_docx, updates)
+    if FAST_PDF:
+        return _render_fast_pdf(out_docx, updates)
+    return convert_docx_to_pdf(out_docx)
 
+
+def tailor_and_save(job_title: str, company_name: str, job_desc: str, job_id: str = None):
+    base_text = distilled_base_text(BASE_DOCX)
+    updates = request_tailored_sections(base_text, job_title, job_desc)
+
+    out_docx = _prepare_outputs(job_title, company_name, job_desc, job_id)
+    out_pdf = _write_resume(out_docx, updates)
+    return out_docx, out_pdf
+
+
+def _write_batch_job(job: tuple, updates: dict):
+    """tailor_many worker: the DOCX, plus its PDF when that needs no LibreOffice cold start."""
+    out_docx = _prepare_outputs(*job)
+    if FAST_PDF or _ensure_unoserver():
+        return out_docx, _write_resume(out_docx, updates)
     apply_updates_to_docx(out_docx, updates)
-    out_pdf = convert_docx_to_pdf(out_docx)
+    return out_docx, None
+
+
+def tailor_many(jobs: list) -> list:
+    """
+    Batch variant of tailor_and_save. jobs: list of (job_title, company_name, job_desc[, job_id]).
+    Jobs without a job_id (or with a repeated one) get their index appended, so
+    no two workers ever write the same file.
+    One streamed LLM request covers every job; each job's files are written in a
+    worker thread as soon as its entry arrives. Without unoserver, the PDFs are
+    converted together by one LibreOffice call at the end.
+    Returns [(out_docx, out_pdf), ...] in input order.
+    """
+    if not jobs:
+        return []
+    ids = [job[3] if len(job) > 3 and job[3] else str(i) for i, job in enumerate(jobs)]
+    if len(set(ids)) < len(ids):
+        ids = [f"{job_id}_{i}" for i, job_id in enumerate(ids)]
+    jobs = [(*job[:3], job_id) for job, job_id in zip(jobs, ids)]
+    base_text = distilled_base_text(BASE_DOCX)
+
+    with ThreadPoolExecutor(max_workers=min(8, len(jobs))) as pool:
+        futures = {}
+        for i, updates in iter_tailored_sections_batch(base_text, [(job[0], job[2]) for job in jobs]):
+            futures[i] = pool.submit(_write_batch_job, jobs[i], updates)
+        outputs = [futures[i].result() for i in range(len(jobs))]
+
+    if FAST_PDF or _ensure_unoserver():
+        return outputs
+    docx_paths = [out_docx for out_docx, _ in outputs]
+    return list(zip(docx_paths, convert_many_docx_to_pdf(docx_paths)))
+
+
+async def tailor_and_save_async(job_title: str, company_name: str, job_desc: str, job_id: str = None):
+    """Async variant of tailor_and_save: network calls are awaited, DOCX/PDF work runs in threads."""
+    base_text = await asyncio.to_thread(distilled_base_text, BASE_DOCX)
+    updates = await request_tailored_sections_async(base_text, job_title, job_desc)
+
+    out_docx = await asyncio.to_thread(_prepare_outputs, job_title, company_name, job_desc, job_id)
+    out_pdf = await asyncio.to_thread(_write_resume, out_docx, updates)
     return out_docx, out_pdf
 
 
+async def tailor_many_async(jobs: list) -> list:
+    """
+    Per-job tailoring for many jobs at once. jobs: list of (job_title, company_name, job_desc[, job_id]).
+    Requests run concurrently, bounded by OPENAI_MAX_CONCURRENCY and the RPM/TPM limiter.
+    Returns [(out_docx, out_pdf), ...] in input order.
+    """
+    return await asyncio.gather(*(tailor_and_save_async(*job) for job in jobs))
+
+
 if __name__ == "__main__":
     job_title = "QA Automation Engineer"
     company_name = "TechNova Systems"
@@ -0,0 +1,42 @@
+"""
+Persistent run state – one SQLite file (WAL mode) shared by the LLM response cache and the CSE page cache
+"""
+
+import os
+import sqlite3
+import threading
+
+STATE_PATH = "data/state.sqlite"
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS llm_cache(key TEXT PRIMARY KEY, response TEXT, ts INTEGER)",
+    "CREATE TABLE IF NOT EXISTS cse_pages(key TEXT PRIMARY KEY, payload BLOB, ts REAL)",
+)
+
+_lock = threading.Lock()
+_conn = None
+
+
+def _connect():
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+        # autocommit; shared by the asyncio loop and worker threads, _lock serializes access
+        conn = sqlite3.connect(STATE_PATH, isolation_level=None, check_same_thread=False)
+        # WAL: readers never block the writer and each write is one append, not a journal rewrite
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for stmt in _SCHEMA:
+            conn.execute(stmt)
+        _conn = conn
+    return _conn
+
+
+def fetchone(sql: str, params: tuple = ()):
+    with _lock:
+        return _connect().execute(sql, params).fetchone()
+
+
+def execute(sql: str, params: tuple = ()):
+    with _lock:
+        _connect().execute(sql, params)
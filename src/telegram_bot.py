@@ -3,8 +3,25 @@ Telegram Bot Utilities – with retry & markdown-safe output
 """
 
 import os
-import time
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+TELEGRAM_MAX_CHARS = 4096
+
+# One keep-alive session for every Telegram call (no TLS handshake per message);
+# urllib3 retries connection errors and 429/5xx with backoff
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.5,
+                      status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset({"GET", "POST"}),
+                      raise_on_status=False),
+))
+
 
 def send_message(text: str):
     token = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -15,19 +32,64 @@ def send_message(text: str):
         return
 
     url = f"https://api.telegram.org/bot{token}/sendMessage"
-    for attempt in range(3):
-        try:
-            r = requests.post(url, data={
-                "chat_id": chat_id,
-                "text": text,
-                "parse_mode": "Markdown"
-            }, timeout=15)
-            if r.status_code == 200:
-                print("✅ Telegram message sent.")
-                return
+    data = {"chat_id": chat_id, "text": text, "parse_mode": "Markdown"}
+    try:
+        r = _SESSION.post(url, data=data, timeout=15)
+        if r.status_code == 400:
+            # unbalanced _ or * (file names, tracebacks) break Markdown parsing; send as plain text
+            del data["parse_mode"]
+            r = _SESSION.post(url, data=data, timeout=15)
+    except requests.exceptions.RequestException as e:
+        print("❌ Telegram send failed after 3 retries:", e)
+        return
+    if r.status_code == 200:
+        print("✅ Telegram message sent.")
+    else:
+        print(f"⚠️ Telegram error {r.status_code}: {r.text}")
+
+
+class MessageBatcher:
+    """
+    Coalesce bursts of status lines into one Telegram message.
+    Lines are flushed after `idle_seconds` without a new line, once the buffer
+    reaches `max_chars`, or on an explicit flush() (call it before exiting).
+    """
+
+    def __init__(self, idle_seconds: float = 0.5, max_chars: int = 1024):
+        self.idle_seconds = idle_seconds
+        self.max_chars = max_chars
+        self.buf = []
+        self.size = 0
+        self._lock = threading.RLock()
+        self._timer = None
+
+    def send(self, text: str):
+        with self._lock:
+            if self.size + len(text) + 1 > TELEGRAM_MAX_CHARS:
+                self.flush()
+            self.buf.append(text)
+            self.size += len(text) + 1
+            if self.size >= self.max_chars:
+                self.flush()
             else:
-                print(f"⚠️ Telegram error {r.status_code}: {r.text}")
-        except requests.exceptions.RequestException as e:
-            print(f"⚠️ Telegram send failed (attempt {attempt+1}/3):", e)
-            time.sleep(3)
-    print("❌ Telegram send failed after 3 attempts.")
+                self._restart_timer()
+
+    def _restart_timer(self):
+        if self._timer:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.idle_seconds, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self):
+        # sending under the lock keeps flushed batches in order
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            if not self.buf:
+                return
+            text = "\n".join(self.buf)
+            self.buf = []
+            self.size = 0
+            send_message(text)